@@ -0,0 +1,357 @@
+"""
+Backend API for the proctored assessment page (proctored_assessment.js).
+
+PDF uploads are queued on a bounded worker pool and return a job ID
+immediately; the client polls /api/jobs/<job_id> until the quiz is ready.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List
+import logging
+
+import cv2
+import numpy as np
+from flask import Flask, Response, jsonify, request, send_from_directory
+from flask_cors import CORS
+
+from job_queue import Job, JobQueue, QueueFullError
+from pdf_processor import PDFProcessor
+from proctor_metrics import ProctorMetrics, format_prometheus
+from proctoring_system import ProctorAI
+from quiz_generator import FreeQuizGenerator
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_FILES = {'proctored_assessment.html', 'proctored_assessment.js', 'proctored_styles.css'}
+
+QUIZ_WORKERS = int(os.environ.get('QUIZ_WORKERS', 2))
+QUIZ_MAX_PENDING = int(os.environ.get('QUIZ_MAX_PENDING', 20))
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_MB', 50)) * 1024 * 1024
+MAX_PDF_PAGES = int(os.environ.get('MAX_PDF_PAGES', PDFProcessor.DEFAULT_MAX_PAGES))
+MAX_QUESTION_WINDOW = 50
+MAX_SESSIONS = int(os.environ.get('MAX_SESSIONS', 200))
+SESSION_TTL = float(os.environ.get('SESSION_TTL', 2 * 3600))  # Seconds of inactivity before a session expires
+
+app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+CORS(app)
+
+logger = logging.getLogger(__name__)
+job_queue = JobQueue(max_workers=QUIZ_WORKERS, max_pending=QUIZ_MAX_PENDING)
+
+sessions: Dict[str, Dict] = {}
+sessions_lock = threading.Lock()
+# Metrics of finished sessions, kept so exported counters never go backwards
+retired_metrics = ProctorMetrics()
+
+
+def get_session(session_id: str) -> Dict:
+    with sessions_lock:
+        session = sessions.get(session_id)
+        if session is not None:
+            session['last_seen'] = time.time()
+        return session
+
+
+def expire_idle_sessions():
+    """Forget sessions idle for longer than the TTL, e.g. abandoned browser tabs. Caller must hold the lock."""
+    cutoff = time.time() - SESSION_TTL
+    expired = [session_id for session_id, session in sessions.items() if session['last_seen'] < cutoff]
+    for session_id in expired:
+        retire_session(sessions.pop(session_id))
+    if expired:
+        logger.info(f"Expired {len(expired)} idle sessions")
+
+
+def retire_session(session: Dict):
+    """Fold a removed session's metrics into the server totals. Caller must hold the lock."""
+    if session['proctor'].metrics:
+        retired_metrics.merge(session['proctor'].metrics)
+
+
+def sessions_full_response():
+    response = jsonify({'error': 'Too many active sessions, please retry shortly'})
+    response.headers['Retry-After'] = '10'
+    return response, 503
+
+
+def decode_frame(frame_data: str) -> np.ndarray:
+    """Decode a base64 JPEG data URL from the browser into a BGR frame."""
+    if ',' in frame_data:
+        frame_data = frame_data.split(',', 1)[1]
+    buffer = np.frombuffer(base64.b64decode(frame_data), dtype=np.uint8)
+    frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode webcam frame")
+    return frame
+
+
+def question_payload(question, question_num: int, total_questions: int) -> Dict:
+    """Client-facing view of a question, without the answer or explanation."""
+    return {
+        'question_num': question_num + 1,
+        'total_questions': total_questions,
+        'question': question.question,
+        'options': question.options
+    }
+
+
+def question_set_etag(session_id: str, payloads: List[Dict]) -> str:
+    """Fingerprint a session's question set so clients can revalidate cheaply."""
+    digest = hashlib.sha1(session_id.encode())
+    digest.update(json.dumps(payloads, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def generate_quiz_job(job: Job, session_id: str, pdf_path: str, num_questions: int) -> Dict:
+    """Background job: extract text from an uploaded PDF and build the session's quiz."""
+    try:
+        job_queue.update_progress(job, 0.1, "Extracting text")
+        pdf_processor = PDFProcessor(max_pages=MAX_PDF_PAGES, max_bytes=MAX_UPLOAD_BYTES)
+        text = pdf_processor.extract_text(pdf_path)
+
+        job_queue.update_progress(job, 0.4, "Cleaning text")
+        cleaned_text = pdf_processor.clean_text(text)
+
+        job_queue.update_progress(job, 0.5, "Generating questions")
+        questions = FreeQuizGenerator().generate_quiz_from_text(cleaned_text, num_questions)
+        if not questions:
+            raise ValueError("Could not generate quiz from this PDF")
+    finally:
+        os.unlink(pdf_path)
+
+    session = get_session(session_id)
+    if session is None:
+        raise ValueError("Session ended before the quiz was ready")
+    payloads = [question_payload(q, i, len(questions)) for i, q in enumerate(questions)]
+    session['questions'] = questions
+    session['question_payloads'] = payloads
+    session['questions_etag'] = question_set_etag(session_id, payloads)
+    session['answers'] = {}
+
+    return {'num_questions': len(questions)}
+
+
+@app.route('/')
+def index():
+    return send_from_directory(BASE_DIR, 'proctored_assessment.html')
+
+
+@app.route('/<path:filename>')
+def static_files(filename):
+    if filename not in STATIC_FILES:
+        return jsonify({'error': 'Not found'}), 404
+    return send_from_directory(BASE_DIR, filename)
+
+
+@app.route('/api/start-proctored-session', methods=['POST'])
+def start_proctored_session():
+    with sessions_lock:
+        expire_idle_sessions()
+        if len(sessions) >= MAX_SESSIONS:
+            return sessions_full_response()
+
+    try:
+        proctor = ProctorAI()
+    except Exception as e:
+        logger.error(f"Could not initialize proctoring: {e}")
+        return jsonify({'error': 'Proctoring is unavailable'}), 500
+    proctor.start_session()
+
+    session_id = uuid.uuid4().hex
+    with sessions_lock:
+        # Re-check: other requests may have filled the last slots meanwhile
+        if len(sessions) >= MAX_SESSIONS:
+            return sessions_full_response()
+        sessions[session_id] = {
+            'proctor': proctor,
+            'last_seen': time.time(),
+            'analysis_lock': threading.Lock(),
+            'questions': [],
+            'question_payloads': [],
+            'questions_etag': None,
+            'answers': {}
+        }
+    return jsonify({'session_id': session_id})
+
+
+@app.route('/api/upload-pdf-proctored', methods=['POST'])
+def upload_pdf_proctored():
+    session_id = request.form.get('session_id', '')
+    if get_session(session_id) is None:
+        return jsonify({'success': False, 'error': 'Unknown session'}), 404
+
+    uploaded_file = request.files.get('pdf')
+    if uploaded_file is None:
+        return jsonify({'success': False, 'error': 'No PDF uploaded'}), 400
+    num_questions = request.form.get('num_questions', type=int) if 'num_questions' in request.form else 10
+    if num_questions is None:
+        return jsonify({'success': False, 'error': 'num_questions must be an integer'}), 400
+    num_questions = min(max(num_questions, 1), 50)
+
+    # Persist the upload so the worker can read it after this request returns;
+    # the worker memory-maps the file instead of loading it into memory
+    fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        uploaded_file.save(tmp_file)
+
+    try:
+        job = job_queue.submit(generate_quiz_job, session_id, pdf_path, num_questions)
+    except QueueFullError as e:
+        os.unlink(pdf_path)
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id,
+        'status_url': f'/api/jobs/{job.job_id}'
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    status = job.to_dict()
+    if job.status == 'completed':
+        status.update(job.result)
+    return jsonify(status)
+
+
+@app.route('/api/get-question/<session_id>/<int:question_num>')
+def get_question(session_id, question_num):
+    session = get_session(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown session'}), 404
+
+    payloads = session['question_payloads']
+    if not 0 <= question_num < len(payloads):
+        return jsonify({'error': 'Question not found'}), 404
+
+    return jsonify(payloads[question_num])
+
+
+@app.route('/api/get-questions/<session_id>')
+def get_questions(session_id):
+    """
+    Return a window of questions (the whole set by default) in one response.
+
+    Query parameters ``start`` and ``count`` select the window. Responses
+    carry an ETag so repeat fetches are answered with 304 Not Modified.
+    """
+    session = get_session(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown session'}), 404
+
+    # Read the ETag before the payloads: the quiz job writes them in the opposite
+    # order, so a racing upload can never pair a new ETag with stale questions
+    etag = session['questions_etag']
+    payloads = session['question_payloads']
+    start = max(request.args.get('start', 0, type=int), 0)
+    count = request.args.get('count', len(payloads), type=int)
+    count = min(max(count, 0), MAX_QUESTION_WINDOW)
+
+    response = jsonify({
+        'total_questions': len(payloads),
+        'start': start,
+        'questions': payloads[start:start + count]
+    })
+    if etag:
+        response.set_etag(f"{etag}-{start}-{count}")
+    # Question sets can be replaced by a new upload, so always revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+@app.route('/api/submit-answer', methods=['POST'])
+def submit_answer():
+    data = request.get_json(silent=True) or {}
+    session = get_session(data.get('session_id', ''))
+    if session is None:
+        return jsonify({'error': 'Unknown session'}), 404
+
+    # Validate the answer before spending time on the frame
+    answer = None
+    if data.get('answer') is not None:
+        try:
+            question_num = int(data.get('question_num', len(session['answers'])))
+            answer = int(data['answer'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'question_num and answer must be integers'}), 400
+        questions = session['questions']
+        if not 0 <= question_num < len(questions):
+            return jsonify({'error': 'Question not found'}), 400
+        if not 0 <= answer < len(questions[question_num].options):
+            return jsonify({'error': 'Answer is not one of the options'}), 400
+
+    violations_detected = []
+    if data.get('webcam_frame'):
+        try:
+            frame = decode_frame(data['webcam_frame'])
+        except Exception as e:
+            # Includes cv2.error for empty frames sent before the video has dimensions
+            return jsonify({'error': f"Invalid webcam frame: {e}"}), 400
+
+        proctor = session['proctor']
+        # ProctorAI is not thread-safe; drop the frame if the previous one is still being analyzed
+        if session['analysis_lock'].acquire(blocking=False):
+            try:
+                violations_detected = proctor.analyze_frame(frame)['violations']
+            finally:
+                session['analysis_lock'].release()
+        elif proctor.metrics:
+            proctor.metrics.frame_dropped()
+
+    if answer is not None:
+        session['answers'][question_num] = answer
+
+    return jsonify({'success': True, 'violations_detected': violations_detected})
+
+
+@app.route('/api/finish-proctored-quiz', methods=['POST'])
+def finish_proctored_quiz():
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id', '')
+    with sessions_lock:
+        session = sessions.pop(session_id, None)
+        if session is not None:
+            retire_session(session)
+    if session is None:
+        return jsonify({'error': 'Unknown session'}), 404
+
+    questions = session['questions']
+    answers = session['answers']
+    correct_answers = sum(1 for i, question in enumerate(questions)
+                          if answers.get(i) == question.correct_answer)
+    total_questions = len(questions)
+
+    return jsonify({
+        'quiz_score': (correct_answers / total_questions) * 100 if total_questions else 0.0,
+        'correct_answers': correct_answers,
+        'total_questions': total_questions,
+        'proctoring_report': session['proctor'].get_session_report()
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Proctoring latency metrics aggregated across sessions, in Prometheus format."""
+    with sessions_lock:
+        active = [session['proctor'].metrics for session in sessions.values() if session['proctor'].metrics]
+        text = format_prometheus(active, retired_metrics)
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    app.run(host=os.environ.get('HOST', '127.0.0.1'), port=int(os.environ.get('PORT', 5000)), threaded=True)
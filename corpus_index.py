@@ -0,0 +1,218 @@
+import math
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+def _pack_strings(strings: List[str]):
+    """Encode strings as one UTF-8 uint8 blob plus an offsets array."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverse of ``_pack_strings``."""
+    data = blob.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+@contextmanager
+def index_lock(index_path: str):
+    """
+    Hold an exclusive lock on an index file for a load-modify-save cycle.
+
+    ``save`` replaces the whole file, so two writers that each loaded the old
+    index would otherwise lose one another's documents. Threads in this
+    process share a lock per path; other processes are excluded with
+    ``flock`` on a ``.lock`` file next to the index where it is available.
+    """
+    path = os.path.abspath(index_path)
+    with _path_locks_guard:
+        path_lock = _path_locks.setdefault(path, threading.Lock())
+
+    with path_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CorpusIndex:
+    """Persistent inverted index of key terms across a course's PDFs.
+
+    Each term maps to the sorted list of documents it appears in, so its
+    document frequency is the length of that posting list. Documents can be
+    added one at a time; re-adding an existing document id replaces its
+    postings instead of duplicating them.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.index_path = index_path
+        self.documents: List[str] = []
+        self.postings: Dict[str, List[int]] = {}
+        self._doc_lookup: Dict[str, int] = {}
+        self._dirty = False
+
+        if index_path and os.path.exists(index_path):
+            self.load(index_path)
+
+    @property
+    def num_documents(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lookup
+
+    def document_frequency(self, term: str) -> int:
+        """Number of indexed documents containing the term."""
+        return len(self.postings.get(term, ()))
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency of a term."""
+        return math.log((1 + self.num_documents) / (1 + self.document_frequency(term))) + 1.0
+
+    def add_document(self, doc_id: str, terms: Iterable[str]):
+        """
+        Add (or replace) a document's terms in the index.
+
+        Args:
+            doc_id (str): Stable identifier for the document, e.g. a hash of its contents
+            terms (Iterable[str]): Terms occurring in the document; duplicates are ignored
+        """
+        if doc_id in self._doc_lookup:
+            doc_idx = self._doc_lookup[doc_id]
+            self._remove_postings(doc_idx)
+        else:
+            doc_idx = len(self.documents)
+            self.documents.append(doc_id)
+            self._doc_lookup[doc_id] = doc_idx
+
+        for term in set(terms):
+            posting = self.postings.setdefault(term, [])
+            # Appends keep postings sorted except when a replaced document is re-added
+            if posting and posting[-1] > doc_idx:
+                posting.append(doc_idx)
+                posting.sort()
+            else:
+                posting.append(doc_idx)
+
+        self._dirty = True
+
+    def _remove_postings(self, doc_idx: int):
+        """Drop a document from every posting list it appears in."""
+        empty_terms = []
+        for term, posting in self.postings.items():
+            if doc_idx in posting:
+                posting.remove(doc_idx)
+                if not posting:
+                    empty_terms.append(term)
+        for term in empty_terms:
+            del self.postings[term]
+
+    def rank_terms(self, term_counts: Dict[str, int], top_n: int = 50) -> List[str]:
+        """
+        Rank a document's terms by TF-IDF against the corpus.
+
+        Args:
+            term_counts (Dict[str, int]): Raw term frequencies for one document
+            top_n (int): Maximum number of terms to return
+
+        Returns:
+            List[str]: Terms ordered from most to least distinctive
+        """
+        scores = {term: count * self.idf(term) for term, count in term_counts.items()}
+        return sorted(scores, key=scores.get, reverse=True)[:top_n]
+
+    def save(self, index_path: Optional[str] = None):
+        """
+        Write the index to disk as an uncompressed ``.npz`` archive.
+
+        Posting lists are concatenated into a single int32 array with an
+        offsets array alongside it, and terms and document ids are stored the
+        same way as one UTF-8 byte blob plus offsets, so loading is a handful
+        of array reads rather than parsing one record per term.
+        """
+        index_path = index_path or self.index_path
+        if not index_path:
+            raise ValueError("No index path given")
+
+        terms = sorted(self.postings)
+        lengths = np.fromiter((len(self.postings[t]) for t in terms), dtype=np.int64, count=len(terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        doc_ids = np.empty(int(offsets[-1]), dtype=np.int32)
+        for term, start, end in zip(terms, offsets[:-1], offsets[1:]):
+            doc_ids[start:end] = self.postings[term]
+        documents_blob, documents_offsets = _pack_strings(self.documents)
+        terms_blob, terms_offsets = _pack_strings(terms)
+
+        # Write next to the target and rename so a crash never leaves a truncated index
+        directory = os.path.dirname(os.path.abspath(index_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                np.savez(
+                    tmp_file,
+                    version=np.array([self.FORMAT_VERSION]),
+                    documents=documents_blob,
+                    document_offsets=documents_offsets,
+                    terms=terms_blob,
+                    term_offsets=terms_offsets,
+                    offsets=offsets,
+                    doc_ids=doc_ids
+                )
+            os.replace(tmp_path, index_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        self.index_path = index_path
+        self._dirty = False
+
+    def save_if_changed(self):
+        """Persist the index only if documents were added since the last save."""
+        if self._dirty:
+            self.save()
+
+    def load(self, index_path: str):
+        """Load an index previously written by ``save``."""
+        with np.load(index_path, allow_pickle=False) as data:
+            version = int(data['version'][0])
+            if version != self.FORMAT_VERSION:
+                raise ValueError(f"Unsupported corpus index version: {version}")
+
+            documents = _unpack_strings(data['documents'], data['document_offsets'])
+            terms = _unpack_strings(data['terms'], data['term_offsets'])
+            offsets = data['offsets']
+            doc_ids = data['doc_ids']
+
+        self.documents = documents
+        self._doc_lookup = {doc_id: idx for idx, doc_id in enumerate(documents)}
+        self.postings = {
+            term: doc_ids[start:end].tolist()
+            for term, start, end in zip(terms, offsets[:-1], offsets[1:])
+        }
+        self.index_path = index_path
+        self._dirty = False
+        self.logger.info(f"Loaded corpus index with {len(documents)} documents and {len(terms)} terms")
@@ -0,0 +1,208 @@
+import cv2
+import numpy as np
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+import logging
+
+# Matches the <clip_id>.avi / <clip_id>.json files written by EvidenceRecorder
+CLIP_FILE_PATTERN = re.compile(r'^(\d{8}_\d{6}_[0-9a-f]{6})\.(avi|json)$')
+
+@dataclass
+class _Clip:
+    clip_id: str
+    violations: Set[str]
+    frames: List[np.ndarray]
+    timestamps: List[float]
+    deadline: float
+    triggered_at: datetime = field(default_factory=datetime.now)
+
+class EvidenceRecorder:
+    """Record short video clips around proctoring violations.
+
+    Recent frames are downscaled into a preallocated ring buffer, so memory
+    use is fixed regardless of session length. When a violation fires, the
+    buffered frames become the start of a clip, frames keep being appended
+    for ``post_seconds``, and the finished clip is handed to a background
+    thread pool for encoding. Triggers during an open clip extend it rather
+    than starting a new one. Finished clips are written as MJPEG ``.avi``
+    files with a JSON sidecar; the oldest clips are deleted once the output
+    directory exceeds ``max_total_bytes``. Only files matching the clip
+    naming scheme are counted or deleted, so ``output_dir`` may be shared.
+    """
+
+    # Shared by all recorders, since they usually write to the same directory
+    _quota_lock = threading.Lock()
+
+    def __init__(self, output_dir: str = "evidence", pre_seconds: float = 5.0, post_seconds: float = 5.0,
+                 buffer_fps: float = 5.0, frame_size: Tuple[int, int] = (320, 240),
+                 max_total_bytes: int = 500 * 1024 * 1024, max_pending_clips: int = 4,
+                 encode_workers: int = 1):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = output_dir
+        self.post_seconds = post_seconds
+        self.buffer_fps = buffer_fps
+        self.frame_size = frame_size
+        self.max_total_bytes = max_total_bytes
+        self.max_pending_clips = max_pending_clips
+
+        width, height = frame_size
+        self._capacity = max(1, math.ceil(pre_seconds * buffer_fps))
+        self._max_clip_frames = self._capacity + max(1, math.ceil(post_seconds * buffer_fps)) * 2
+        self._frames = np.empty((self._capacity, height, width, 3), dtype=np.uint8)
+        self._timestamps = np.zeros(self._capacity, dtype=np.float64)
+        self._next_slot = 0
+        self._buffered = 0
+        self._last_buffered_at = None
+
+        self._active_clip: Optional[_Clip] = None
+        self._pending_clips = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix='evidence-encoder')
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add_frame(self, frame: np.ndarray, now: Optional[float] = None):
+        """Buffer a captured frame; frames arriving faster than ``buffer_fps`` are skipped."""
+        now = time.time() if now is None else now
+        interval = 1.0 / self.buffer_fps
+        if self._last_buffered_at is not None and now - self._last_buffered_at < interval:
+            return
+
+        with self._lock:
+            # Re-check under the lock in case another thread just buffered a frame
+            if self._last_buffered_at is not None and now - self._last_buffered_at < interval:
+                return
+            # Advance on a fixed grid so capture jitter doesn't lower the sampling rate
+            # below buffer_fps (the rate clips are encoded at); resync after a gap
+            if self._last_buffered_at is None or now - self._last_buffered_at >= 2 * interval:
+                self._last_buffered_at = now
+            else:
+                self._last_buffered_at += interval
+            slot = self._next_slot
+            cv2.resize(frame, self.frame_size, dst=self._frames[slot], interpolation=cv2.INTER_AREA)
+            self._timestamps[slot] = now
+            self._next_slot = (slot + 1) % self._capacity
+            self._buffered = min(self._buffered + 1, self._capacity)
+
+            clip = self._active_clip
+            if clip is not None:
+                clip.frames.append(self._frames[slot].copy())
+                clip.timestamps.append(now)
+                if now >= clip.deadline or len(clip.frames) >= self._max_clip_frames:
+                    self._finish_clip()
+
+    def trigger(self, violations: Iterable[str], now: Optional[float] = None) -> Optional[str]:
+        """
+        Start (or extend) a clip for the given violations.
+
+        Returns:
+            Optional[str]: ID of the clip the violations were recorded in, or
+            None if too many clips are already waiting to be encoded
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            clip = self._active_clip
+            if clip is not None:
+                clip.violations.update(violations)
+                clip.deadline = now + self.post_seconds
+                return clip.clip_id
+
+            if self._pending_clips >= self.max_pending_clips:
+                self.logger.warning("Evidence encoder is backlogged, dropping clip")
+                return None
+
+            # Oldest-first copy of the buffered pre-violation frames
+            order = [(self._next_slot - self._buffered + i) % self._capacity for i in range(self._buffered)]
+            clip = _Clip(
+                clip_id=f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}",
+                violations=set(violations),
+                frames=list(self._frames[order]),
+                timestamps=self._timestamps[order].tolist(),
+                deadline=now + self.post_seconds
+            )
+            self._active_clip = clip
+            return clip.clip_id
+
+    def flush(self):
+        """Hand any open clip to the encoder immediately, e.g. at session end."""
+        with self._lock:
+            if self._active_clip is not None:
+                self._finish_clip()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _finish_clip(self):
+        """Queue the active clip for encoding. Caller must hold the lock."""
+        clip = self._active_clip
+        self._active_clip = None
+        self._pending_clips += 1
+        self._executor.submit(self._encode_clip, clip)
+
+    def _encode_clip(self, clip: _Clip):
+        try:
+            video_path = os.path.join(self.output_dir, f"{clip.clip_id}.avi")
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), self.buffer_fps, self.frame_size)
+            try:
+                for frame in clip.frames:
+                    writer.write(frame)
+            finally:
+                writer.release()
+
+            # The clip opens with the pre-violation buffer, so it starts at its first frame
+            started_at = datetime.fromtimestamp(clip.timestamps[0]) if clip.timestamps else clip.triggered_at
+            with open(os.path.join(self.output_dir, f"{clip.clip_id}.json"), 'w') as metadata_file:
+                json.dump({
+                    'clip_id': clip.clip_id,
+                    'violations': sorted(clip.violations),
+                    'started_at': started_at.isoformat(),
+                    'triggered_at': clip.triggered_at.isoformat(),
+                    'frame_timestamps': clip.timestamps
+                }, metadata_file)
+
+            self._enforce_quota()
+        except Exception as e:
+            self.logger.error(f"Failed to encode evidence clip {clip.clip_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending_clips -= 1
+
+    def _enforce_quota(self):
+        """Delete the oldest clips until the output directory fits in ``max_total_bytes``."""
+        with self._quota_lock:
+            # Group each clip's video and sidecar so they are always deleted together
+            clips = {}
+            for name in os.listdir(self.output_dir):
+                match = CLIP_FILE_PATTERN.match(name)
+                if not match:
+                    continue
+                path = os.path.join(self.output_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Another process may be enforcing the quota on the same directory
+                    continue
+                clip_id = match.group(1)
+                newest, size, paths = clips.get(clip_id, (0.0, 0, []))
+                clips[clip_id] = (max(newest, stat.st_mtime), size + stat.st_size, paths + [path])
+
+            total = sum(size for _, size, _ in clips.values())
+            for _, size, paths in sorted(clips.values()):
+                if total <= self.max_total_bytes:
+                    break
+                for path in paths:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+import logging
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more pending work."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    status: str = 'queued'  # queued, running, completed, failed
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Bounded background worker pool for long-running jobs.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending``
+    jobs (running or queued) are accepted; further submissions raise
+    ``QueueFullError`` so callers can shed load instead of piling up work.
+    Finished jobs are kept for ``job_ttl`` seconds so clients can poll them.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, job_ttl: float = 3600):
+        self.logger = logging.getLogger(__name__)
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Job:
+        """
+        Schedule ``func(job, *args, **kwargs)`` on the worker pool.
+
+        The function receives its ``Job`` so it can report progress via
+        ``update_progress``; its return value becomes ``job.result``.
+        """
+        with self._lock:
+            self._expire_finished()
+            if self._pending >= self.max_pending:
+                raise QueueFullError("Too many jobs in progress, please retry shortly")
+            job = Job(job_id=uuid.uuid4().hex)
+            self._jobs[job.job_id] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update_progress(self, job: Job, progress: float, message: str = ""):
+        job.progress = min(max(progress, 0.0), 1.0)
+        if message:
+            job.message = message
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable, args, kwargs):
+        job.status = 'running'
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.progress = 1.0
+            job.status = 'completed'
+        except Exception as e:
+            self.logger.error(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def _expire_finished(self):
+        """Forget finished jobs older than the TTL. Caller must hold the lock."""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,358 @@
+"""
+Load generator that simulates concurrent proctored examinees.
+
+Each simulated client behaves like proctored_assessment.js: it starts a
+session, optionally uploads a PDF and waits for the quiz, sends a webcam
+frame every few seconds, submits answers and finishes the quiz. Clients are
+run at increasing concurrency levels against a locally started api_server.py,
+and per-endpoint latency, error rate and server CPU/RSS are reported for
+each level so the saturation point can be found.
+
+Example:
+    python load_test.py --frames-dir recorded_frames --levels 1,5,10,25,50 --duration 60
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import psutil
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency and error collection."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.unmeasured: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def record_error(self, endpoint: str):
+        """Count a failure that has no meaningful latency, e.g. a job that never finished."""
+        with self._lock:
+            self.unmeasured[endpoint] += 1
+            self.errors[endpoint] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            results = {}
+            for endpoint in sorted(set(self.latencies) | set(self.unmeasured)):
+                values = sorted(self.latencies.get(endpoint, []))
+                requests = len(values) + self.unmeasured.get(endpoint, 0)
+                results[endpoint] = {
+                    'requests': requests,
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'error_rate': self.errors[endpoint] / requests
+                }
+            return results
+
+
+class ResourceSampler:
+    """Samples CPU and RSS of the server process in the background."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.cpu_samples: List[float] = []
+        self.rss_samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = None
+        # cpu_percent(None) measures since the previous call on the same object,
+        # so child Process objects are kept between samples
+        self._children: Dict[int, psutil.Process] = {}
+
+    def start(self):
+        self.process.cpu_percent(None)  # Prime the counter
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        self._thread.join()
+        if not self.cpu_samples:
+            return {}
+        return {
+            'cpu_avg_percent': sum(self.cpu_samples) / len(self.cpu_samples),
+            'cpu_max_percent': max(self.cpu_samples),
+            'rss_max_mb': max(self.rss_samples) / 1024 / 1024
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                children = {child.pid: self._children.get(child.pid, child)
+                            for child in self.process.children(recursive=True)}
+                self._children = children
+                cpu = self.process.cpu_percent(None)
+                rss = self.process.memory_info().rss
+            except psutil.NoSuchProcess:
+                break
+            for child in children.values():
+                # Children may exit between listing and sampling
+                try:
+                    cpu += child.cpu_percent(None)
+                    rss += child.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.cpu_samples.append(cpu)
+            self.rss_samples.append(rss)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SimulatedExaminee:
+    """One examinee following the proctored_assessment.js request pattern."""
+
+    def __init__(self, base_url: str, recorder: LatencyRecorder, frames: List[str], args):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.frames = frames
+        self.args = args
+        self.retry_after = 0.0
+
+    def request(self, endpoint: str, path: str, body: Optional[bytes] = None,
+                content_type: str = 'application/json') -> Optional[Dict]:
+        request = urllib.request.Request(self.base_url + path, data=body)
+        if body is not None:
+            request.add_header('Content-Type', content_type)
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.args.timeout) as response:
+                payload = json.loads(response.read() or b'{}')
+            ok = True
+        except urllib.error.HTTPError as e:
+            # Remember the server's hint so the next session backs off accordingly
+            try:
+                self.retry_after = max(self.retry_after, float(e.headers.get('Retry-After', 0)))
+            except ValueError:
+                pass
+            payload = None
+            ok = False
+        except (urllib.error.URLError, OSError, ValueError):
+            payload = None
+            ok = False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return payload
+
+    def post_json(self, endpoint: str, data: Dict) -> Optional[Dict]:
+        return self.request(endpoint, endpoint, json.dumps(data).encode())
+
+    def upload_pdf(self, session_id: str, deadline: float) -> int:
+        """Upload the PDF and wait for quiz generation. Returns the question count, or 0 on failure."""
+        boundary = uuid.uuid4().hex
+        with open(self.args.pdf, 'rb') as file:
+            pdf_bytes = file.read()
+        parts = []
+        for name, value in (('session_id', session_id), ('num_questions', str(self.args.questions))):
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="pdf"; filename="quiz.pdf"\r\n'
+                     f'Content-Type: application/pdf\r\n\r\n'.encode() + pdf_bytes + b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode())
+
+        result = self.request('/api/upload-pdf-proctored', '/api/upload-pdf-proctored', b''.join(parts),
+                              f'multipart/form-data; boundary={boundary}')
+        if not result or not result.get('success'):
+            return 0
+
+        while True:
+            if time.time() >= deadline:
+                self.recorder.record_error('quiz job (timed out)')
+                return 0
+            job = self.request('/api/jobs', result['status_url'])
+            if not job:
+                return 0
+            if job['status'] == 'failed':
+                self.recorder.record_error('quiz job (failed)')
+                return 0
+            if job['status'] == 'completed':
+                break
+            time.sleep(1)
+
+        self.request('/api/get-questions', f"/api/get-questions/{session_id}?start=0&count={self.args.questions}")
+        return job['num_questions']
+
+    def run(self, deadline: float):
+        # Stagger clients so they don't send frames in lockstep
+        time.sleep(random.uniform(0, self.args.frame_interval))
+
+        while time.time() < deadline:
+            session = self.post_json('/api/start-proctored-session', {})
+            if not session or 'session_id' not in session:
+                self.back_off(deadline)
+                continue
+            session_id = session['session_id']
+
+            num_questions = self.upload_pdf(session_id, deadline) if self.args.pdf else self.args.questions
+            if not num_questions:
+                # Don't turn a saturated server into a tight loop of new sessions
+                self.post_json('/api/finish-proctored-quiz', {'session_id': session_id})
+                self.back_off(deadline)
+                continue
+            frame_index = random.randrange(len(self.frames))
+
+            for question_num in range(num_questions):
+                for _ in range(self.args.frames_per_question):
+                    if time.time() >= deadline:
+                        break
+                    self.post_json('/api/submit-answer', {
+                        'session_id': session_id,
+                        'webcam_frame': self.frames[frame_index % len(self.frames)],
+                        'answer': None
+                    })
+                    frame_index += 1
+                    time.sleep(self.args.frame_interval)
+
+                self.post_json('/api/submit-answer', {
+                    'session_id': session_id,
+                    'question_num': question_num,
+                    'answer': random.randrange(4),
+                    'webcam_frame': None
+                })
+                if time.time() >= deadline:
+                    break
+
+            self.post_json('/api/finish-proctored-quiz', {'session_id': session_id})
+
+    def back_off(self, deadline: float):
+        """Wait before retrying, honouring the server's Retry-After if it sent one."""
+        delay = max(self.args.frame_interval, self.retry_after)
+        self.retry_after = 0.0
+        time.sleep(max(0.0, min(delay, deadline - time.time())))
+
+
+def load_frames(frames_dir: str) -> List[str]:
+    """Load pre-recorded JPEG frames as the data URLs the browser would send."""
+    paths = sorted(glob.glob(os.path.join(frames_dir, '*.jpg')) + glob.glob(os.path.join(frames_dir, '*.jpeg')))
+    if not paths:
+        raise ValueError(f"No JPEG frames found in {frames_dir}")
+    frames = []
+    for path in paths:
+        with open(path, 'rb') as file:
+            frames.append('data:image/jpeg;base64,' + base64.b64encode(file.read()).decode('ascii'))
+    return frames
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Start api_server.py locally and wait until it accepts requests."""
+    env = dict(os.environ, PORT=str(port))
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_server.py')
+    server = subprocess.Popen([sys.executable, server_path], env=env)
+
+    for _ in range(60):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1).close()
+            return server
+        except (urllib.error.URLError, OSError):
+            if server.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("API server did not start within 30 seconds")
+
+
+def run_level(base_url: str, concurrency: int, frames: List[str], server_pid: Optional[int], args) -> Dict:
+    recorder = LatencyRecorder()
+    sampler = ResourceSampler(server_pid) if server_pid else None
+    deadline = time.time() + args.duration
+
+    if sampler:
+        sampler.start()
+    clients = [threading.Thread(target=SimulatedExaminee(base_url, recorder, frames, args).run,
+                                args=(deadline,), daemon=True)
+               for _ in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    return {
+        'concurrency': concurrency,
+        'endpoints': recorder.summary(),
+        'server': sampler.stop() if sampler else {}
+    }
+
+
+def print_level(result: Dict):
+    server = result['server']
+    print(f"\n=== {result['concurrency']} concurrent examinees ===")
+    if server:
+        print(f"server CPU avg {server['cpu_avg_percent']:.0f}% / max {server['cpu_max_percent']:.0f}%, "
+              f"peak RSS {server['rss_max_mb']:.0f} MB")
+    print(f"{'endpoint':<32}{'requests':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for endpoint, stats in result['endpoints'].items():
+        print(f"{endpoint:<32}{stats['requests']:>10}{stats['p50_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['error_rate']:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent proctored examinees against the API server")
+    parser.add_argument('--frames-dir', required=True, help="Directory of pre-recorded JPEG webcam frames")
+    parser.add_argument('--pdf', help="PDF to upload for each session (skips quiz generation if omitted)")
+    parser.add_argument('--levels', default='1,5,10,25,50', help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds to run each level")
+    parser.add_argument('--frame-interval', type=float, default=5.0, help="Seconds between webcam frames")
+    parser.add_argument('--frames-per-question', type=int, default=4, help="Frames sent before each answer")
+    parser.add_argument('--questions', type=int, default=10, help="Questions per simulated quiz")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument('--port', type=int, default=5055, help="Port for the locally started server")
+    parser.add_argument('--url', help="Use an already running server instead of starting one")
+    parser.add_argument('--server-pid', type=int, help="PID of the server given by --url, for CPU/RSS stats")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir)
+    levels = [int(level) for level in args.levels.split(',')]
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        server_pid = args.server_pid
+    else:
+        server = start_server(args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+        server_pid = server.pid
+
+    results = []
+    try:
+        for concurrency in levels:
+            result = run_level(base_url, concurrency, frames, server_pid, args)
+            print_level(result)
+            results.append(result)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
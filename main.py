@@ -1,13 +1,15 @@
 # Updated main.py for free quiz generation
 
 import streamlit as st
-import tempfile
-import os
+import hashlib
 from pdf_processor import PDFProcessor
 from quiz_generator import FreeQuizGenerator, QuizQuestion
+from corpus_index import CorpusIndex, index_lock
 from typing import List
 import json
 
+CORPUS_INDEX_PATH = "corpus_index.npz"
+
 # Initialize session state
 if 'quiz_questions' not in st.session_state:
     st.session_state.quiz_questions = []
@@ -18,27 +20,29 @@ if 'user_answers' not in st.session_state:
 if 'quiz_completed' not in st.session_state:
     st.session_state.quiz_completed = False
 
-def process_pdf_to_quiz(uploaded_file, num_questions: int = 10):
+def process_pdf_to_quiz(uploaded_file, num_questions: int = 10, corpus_mode: bool = False):
     """Process uploaded PDF and convert to quiz."""
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_file_path = tmp_file.name
-        
-        # Extract text from PDF
+        # Extract text straight from the upload buffer
         pdf_processor = PDFProcessor()
-        text = pdf_processor.extract_text(tmp_file_path)
-        
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
+        text = pdf_processor.extract_text(uploaded_file)
         
         # Clean the extracted text
         cleaned_text = pdf_processor.clean_text(text)
         
-        # Generate quiz
+        # Generate quiz, scoring key terms against the course corpus if enabled
         quiz_generator = FreeQuizGenerator()
-        questions = quiz_generator.generate_quiz_from_text(cleaned_text, num_questions)
+        term_counts = None
+        if corpus_mode:
+            # Key documents by content so different PDFs sharing a file name don't collide
+            doc_id = hashlib.sha1(uploaded_file.getbuffer()).hexdigest()
+            # Tag outside the lock; only the load-add-save cycle has to be serialized
+            term_counts = quiz_generator.count_candidate_terms(cleaned_text)
+            with index_lock(CORPUS_INDEX_PATH):
+                quiz_generator.corpus_index = CorpusIndex(CORPUS_INDEX_PATH)
+                quiz_generator.index_document(doc_id, cleaned_text, term_counts)
+                quiz_generator.corpus_index.save_if_changed()
+        questions = quiz_generator.generate_quiz_from_text(cleaned_text, num_questions, term_counts)
         
         return questions, cleaned_text
         
@@ -68,6 +72,10 @@ def main():
     # Sidebar for configuration
     st.sidebar.header(" Configuration")
     num_questions = st.sidebar.slider("Number of Questions", 5, 20, 10)
+    corpus_mode = st.sidebar.checkbox(
+        "Course corpus mode",
+        help="Add each PDF to a shared course index and rank key terms by TF-IDF across all chapters"
+    )
     
     # Information about the free method
     st.sidebar.info("""
@@ -89,7 +97,7 @@ def main():
         
         if st.button("Generate Quiz", type="primary"):
             with st.spinner(" Processing PDF and generating quiz..."):
-                questions, extracted_text = process_pdf_to_quiz(uploaded_file, num_questions)
+                questions, extracted_text = process_pdf_to_quiz(uploaded_file, num_questions, corpus_mode)
                 
                 if questions:
                     st.session_state.quiz_questions = questions
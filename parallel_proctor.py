@@ -0,0 +1,261 @@
+import cv2
+import numpy as np
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from evidence_recorder import EvidenceRecorder
+from proctoring_system import ProctorAI, ProctorSessionLog
+
+FRAME_SHAPE = (480, 640, 3)  # Matches the resolution WebcamHandler requests
+
+def _worker_main(shm_name: str, num_slots: int, frame_shape: Tuple[int, int, int],
+                 reference_image_path: Optional[str], enable_metrics: bool, tasks, results, free_slots):
+    """Worker process: analyze frames straight out of the shared slot pool.
+
+    Messages on ``results`` are ``(kind, payload)`` tuples where ``kind`` is
+    ``'ready'``, ``'fatal_error'`` or ``'result'``.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((num_slots,) + frame_shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        try:
+            proctor = ProctorAI(enable_metrics=enable_metrics)
+            if reference_image_path:
+                proctor.load_reference_face(reference_image_path)
+        except Exception as e:
+            results.put(('fatal_error', str(e)))
+            return
+        results.put(('ready', None))
+
+        histograms = proctor.metrics.histograms if enable_metrics else None
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, submitted_at = task
+            if histograms:
+                # perf_counter is a system-wide monotonic clock, so it is comparable across processes
+                queue_wait = time.perf_counter() - submitted_at
+                before = {stage: (h.count, h.total) for stage, h in histograms.items()}
+            try:
+                result = proctor.analyze_frame(frames[slot])
+            except Exception as e:
+                result = {'error': str(e), 'violations': []}
+            finally:
+                # The slot can be reused as soon as analysis is done with it
+                free_slots.put(slot)
+
+            if histograms:
+                # Ship this frame's stage timings back; the parent owns the session metrics
+                result['stage_seconds'] = {
+                    stage: h.total - before[stage][1]
+                    for stage, h in histograms.items() if h.count > before[stage][0]
+                }
+                result['queue_wait'] = queue_wait
+            # The parent keeps the authoritative timeline; don't let this copy grow
+            proctor.violation_timestamps.clear()
+            results.put(('result', result))
+    finally:
+        del frames
+        shm.close()
+
+class ParallelProctor(ProctorSessionLog):
+    """Run ProctorAI frame analysis across several worker processes.
+
+    Frames are copied once into a pool of slots in shared memory; workers
+    read them as zero-copy NumPy views, so only slot indices and small
+    result dicts cross process boundaries. When every slot is busy the frame
+    is dropped rather than queued, which keeps latency bounded when capture
+    outpaces analysis. ``submit`` can be passed directly as a
+    ``WebcamHandler`` frame callback.
+
+    Workers only detect violations and time their stages; counting, the
+    timeline, metrics and the session report live here in the parent via
+    ``ProctorSessionLog``.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, num_slots: Optional[int] = None,
+                 frame_shape: Tuple[int, int, int] = FRAME_SHAPE,
+                 reference_image_path: Optional[str] = None, enable_metrics: bool = True,
+                 evidence_recorder: Optional[EvidenceRecorder] = None,
+                 result_callback: Optional[Callable[[Dict], None]] = None,
+                 startup_timeout: float = 60.0):
+        super().__init__(enable_metrics, evidence_recorder)
+        self.logger = logging.getLogger(__name__)
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.num_slots = num_slots or self.num_workers * 2
+        self.frame_shape = frame_shape
+        self.result_callback = result_callback
+        # Reentrant: record_violations is called from _record_result while held
+        self._state_lock = threading.RLock()
+
+        frame_bytes = int(np.prod(frame_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_bytes * self.num_slots)
+        self._frames = np.ndarray((self.num_slots,) + frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+
+        # Spawn rather than fork: dlib and OpenCV do not survive forking a threaded process
+        context = mp.get_context('spawn')
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._free_slots = context.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+
+        self._workers = [
+            context.Process(
+                target=_worker_main,
+                args=(self._shm.name, self.num_slots, frame_shape, reference_image_path,
+                      enable_metrics, self._tasks, self._results, self._free_slots),
+                daemon=True
+            )
+            for _ in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._collector = None
+
+        if self._wait_for_workers(startup_timeout) == 0:
+            self._stop_workers()
+            self._release_shared_memory()
+            raise RuntimeError("No proctoring worker could start")
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    @property
+    def healthy_workers(self) -> int:
+        """Number of worker processes still running"""
+        return sum(worker.is_alive() for worker in self._workers)
+
+    def _wait_for_workers(self, timeout: float) -> int:
+        """
+        Wait for each worker to report in; returns how many started successfully.
+
+        Workers still starting when the timeout expires report to the
+        collector thread instead, which skips their messages.
+        """
+        ready = 0
+        deadline = time.monotonic() + timeout
+        for _ in self._workers:
+            try:
+                kind, payload = self._results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.logger.error("Timed out waiting for proctoring workers to start")
+                break
+            if kind == 'fatal_error':
+                self.logger.error(f"Proctoring worker failed to start: {payload}")
+            else:
+                ready += 1
+        return ready
+
+    def start_session(self):
+        """Start proctoring session"""
+        with self._state_lock:
+            super().start_session()
+
+    def submit(self, frame: np.ndarray) -> bool:
+        """
+        Queue a frame for analysis.
+
+        Returns:
+            bool: False if all slots were busy and the frame was dropped
+
+        Raises:
+            RuntimeError: If every worker process has exited
+        """
+        try:
+            slot = self._free_slots.get_nowait()
+        except queue.Empty:
+            # Dead workers never return their slots, so check only when none are free
+            if self.healthy_workers == 0:
+                raise RuntimeError("All proctoring workers have exited")
+            if self.metrics:
+                self.metrics.frame_dropped()
+            return False
+
+        target = self._frames[slot]
+        if frame.shape == self.frame_shape:
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]), dst=target)
+
+        self._tasks.put((slot, time.perf_counter()))
+        return True
+
+    def _collect_results(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                break
+            kind, payload = message
+            if kind == 'fatal_error':
+                self.logger.error(f"Proctoring worker failed to start: {payload}")
+                continue
+            if kind != 'result':
+                continue
+            if 'error' in payload:
+                self.logger.error(f"Frame analysis failed: {payload['error']}")
+
+            # A bad result or callback must not stop collection for the rest of the session
+            try:
+                self._record_result(payload)
+                if self.result_callback:
+                    self.result_callback(payload)
+            except Exception as e:
+                self.logger.error(f"Failed to handle frame result: {e}")
+
+    def _record_result(self, result: Dict):
+        with self._state_lock:
+            if self.metrics and 'stage_seconds' in result and 'error' not in result:
+                for stage, seconds in result['stage_seconds'].items():
+                    self.metrics.observe(stage, seconds)
+                self.metrics.observe('queue_wait', result['queue_wait'])
+                self.metrics.frame_analyzed()
+
+            self.record_violations(result['violations'])
+            result['total_violations'] = sum(self.violations.values())
+
+    def record_violations(self, violations_detected: List[str]):
+        with self._state_lock:
+            super().record_violations(violations_detected)
+
+    def get_session_report(self) -> Dict:
+        """Generate final proctoring report"""
+        with self._state_lock:
+            report = super().get_session_report()
+            # Copy so callers don't see later updates from the collector thread
+            report['violation_breakdown'] = dict(report['violation_breakdown'])
+            report['violation_timeline'] = list(report['violation_timeline'])
+        return report
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        self._stop_workers()
+        self._results.put(None)
+        self._collector.join()
+        self._release_shared_memory()
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def _release_shared_memory(self):
+        del self._frames
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,58 +1,133 @@
 import PyPDF2
 import fitz  # PyMuPDF - alternative PDF reader
-from typing import Optional, List
+import io
+import itertools
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Optional, List, Union, BinaryIO
 import logging
 
+# A PDF can be given as a file path, an in-memory buffer, or an open binary file
+PDFSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
 class PDFProcessor:
     """Handles PDF text extraction with multiple fallback methods."""
     
-    def __init__(self):
+    DEFAULT_MAX_PAGES = 500
+    DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+    
+    def __init__(self, max_pages: Optional[int] = None, max_bytes: Optional[int] = None):
         self.logger = logging.getLogger(__name__)
+        self.max_pages = max_pages or self.DEFAULT_MAX_PAGES
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+    
+    def check_size(self, source: PDFSource) -> int:
+        """Return the size of the PDF in bytes, rejecting files over ``max_bytes``."""
+        if isinstance(source, str):
+            size = os.path.getsize(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            size = memoryview(source).nbytes
+        else:
+            position = source.tell()
+            size = source.seek(0, io.SEEK_END)
+            source.seek(position)
+        
+        if size > self.max_bytes:
+            raise ValueError(f"PDF is too large ({size / 1024 / 1024:.1f} MB, limit is {self.max_bytes / 1024 / 1024:.0f} MB)")
+        return size
+    
+    @contextmanager
+    def _open_stream(self, source: PDFSource):
+        """
+        Yield a seekable binary stream over the PDF without loading a copy of it.
+        
+        Paths and real files are memory-mapped; in-memory buffers are wrapped
+        directly (``io.BytesIO`` shares the buffer of a ``bytes`` object).
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            yield io.BytesIO(source)
+        elif isinstance(source, io.BytesIO):
+            source.seek(0)
+            yield source
+        else:
+            try:
+                fileno = source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                source.seek(0)
+                yield source
+            else:
+                with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                    yield mapped
     
-    def extract_text_pypdf2(self, pdf_path: str) -> str:
+    def _open_fitz(self, source: PDFSource):
+        """Open a PyMuPDF document, letting MuPDF read paths and buffers directly."""
+        if isinstance(source, str):
+            return fitz.open(source)
+        if isinstance(source, bytes):
+            return fitz.open(stream=source, filetype="pdf")
+        if isinstance(source, io.BytesIO):
+            # getvalue() returns the BytesIO's own buffer rather than a copy
+            return fitz.open(stream=source.getvalue(), filetype="pdf")
+        # Other buffers and file objects need one copy for PyMuPDF
+        if isinstance(source, (bytearray, memoryview)):
+            return fitz.open(stream=bytes(source), filetype="pdf")
+        source.seek(0)
+        return fitz.open(stream=source.read(), filetype="pdf")
+    
+    def _limit_pages(self, page_count: int) -> int:
+        if page_count > self.max_pages:
+            self.logger.warning(f"PDF has {page_count} pages, only the first {self.max_pages} will be used")
+            return self.max_pages
+        return page_count
+    
+    def extract_text_pypdf2(self, source: PDFSource) -> str:
         """Extract text using PyPDF2."""
         try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            with self._open_stream(source) as stream:
+                pdf_reader = PyPDF2.PdfReader(stream)
+                page_count = self._limit_pages(len(pdf_reader.pages))
+                pages = itertools.islice(pdf_reader.pages, page_count)
+                text = "\n".join(page.extract_text() or "" for page in pages)
             return text.strip()
         except Exception as e:
             self.logger.error(f"PyPDF2 extraction failed: {e}")
             return ""
     
-    def extract_text_pymupdf(self, pdf_path: str) -> str:
+    def extract_text_pymupdf(self, source: PDFSource) -> str:
         """Extract text using PyMuPDF (fallback method)."""
         try:
-            text = ""
-            pdf_document = fitz.open(pdf_path)
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text() + "\n"
-            pdf_document.close()
+            with self._open_fitz(source) as pdf_document:
+                page_count = self._limit_pages(pdf_document.page_count)
+                text = "\n".join(pdf_document[page_num].get_text() for page_num in range(page_count))
             return text.strip()
         except Exception as e:
             self.logger.error(f"PyMuPDF extraction failed: {e}")
             return ""
     
-    def extract_text(self, pdf_path: str) -> str:
+    def extract_text(self, source: PDFSource) -> str:
         """
         Extract text from PDF using the best available method.
         
         Args:
-            pdf_path (str): Path to the PDF file
+            source (PDFSource): Path to the PDF file, its bytes, or an open binary file
+                (e.g. a Streamlit upload), which is read in place rather than copied
             
         Returns:
             str: Extracted text from the PDF
         """
+        self.check_size(source)
+        
         # Try PyPDF2 first
-        text = self.extract_text_pypdf2(pdf_path)
+        text = self.extract_text_pypdf2(source)
         
         # If PyPDF2 fails or returns empty, try PyMuPDF
         if not text:
             self.logger.info("Trying PyMuPDF as fallback...")
-            text = self.extract_text_pymupdf(pdf_path)
+            text = self.extract_text_pymupdf(source)
         
         if not text:
             raise ValueError("Could not extract text from PDF using any method")
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with power-of-two bucket bounds.
+
+    Observing a value is a bisect into a small tuple plus a few integer
+    updates, so it is cheap enough to call on every frame.
+    """
+
+    # 0.25 ms doubling up to ~8 s; anything slower lands in the overflow bucket
+    BUCKET_BOUNDS = tuple(0.00025 * 2 ** i for i in range(16))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's observations to this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket containing the given percentile."""
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.BUCKET_BOUNDS, self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': (self.total / self.count) * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class ProctorMetrics:
+    """Per-stage timings and frame counters for a ProctorAI session.
+
+    Stages are timed by the caller with ``time.perf_counter()``; ``record``
+    returns the current time so consecutive stages can be chained without
+    extra clock reads. Histograms are written only by the thread running the
+    analysis and are not locked. Frame counters take a small lock, because
+    dropped frames are reported from other threads (e.g. API request threads)
+    while an analysis is running.
+    """
+
+    # 'queue_wait' (time a frame waits for a free worker) is only recorded by ParallelProctor
+    STAGES = ('face_locations', 'face_encodings', 'looking_away', 'phone_detection', 'total', 'queue_wait')
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+        self.last_analyzed_at: Optional[float] = None
+        self._counter_lock = threading.Lock()
+
+    def record(self, stage: str, start: float) -> float:
+        now = time.perf_counter()
+        self.histograms[stage].observe(now - start)
+        return now
+
+    def observe(self, stage: str, seconds: float):
+        """Record a duration measured elsewhere, e.g. in a worker process."""
+        self.histograms[stage].observe(seconds)
+
+    def frame_analyzed(self):
+        with self._counter_lock:
+            self.frames_analyzed += 1
+            self.last_analyzed_at = time.monotonic()
+
+    def frame_dropped(self):
+        with self._counter_lock:
+            self.frames_dropped += 1
+
+    def merge(self, other: 'ProctorMetrics'):
+        """Add another session's metrics to this one, e.g. to aggregate across sessions."""
+        for stage, histogram in other.histograms.items():
+            self.histograms[stage].merge(histogram)
+        with other._counter_lock:
+            frames_analyzed, frames_dropped = other.frames_analyzed, other.frames_dropped
+            last_analyzed_at = other.last_analyzed_at
+        with self._counter_lock:
+            self.frames_analyzed += frames_analyzed
+            self.frames_dropped += frames_dropped
+            if last_analyzed_at is not None:
+                self.last_analyzed_at = max(self.last_analyzed_at or last_analyzed_at, last_analyzed_at)
+
+    def seconds_since_last_frame(self) -> Optional[float]:
+        if self.last_analyzed_at is None:
+            return None
+        return time.monotonic() - self.last_analyzed_at
+
+    def snapshot(self) -> Dict:
+        return {
+            'frames_analyzed': self.frames_analyzed,
+            'frames_dropped': self.frames_dropped,
+            'seconds_since_last_frame': self.seconds_since_last_frame(),
+            'stages': {stage: histogram.to_dict() for stage, histogram in self.histograms.items()}
+        }
+
+
+def format_prometheus(active: Iterable[ProctorMetrics], retired: Optional[ProctorMetrics] = None) -> str:
+    """
+    Render metrics aggregated across sessions in the Prometheus text format.
+
+    Series carry only a ``stage`` label, never a session id, so the number of
+    series stays fixed however many examinees come and go.
+
+    Args:
+        active: Metrics of the sessions currently running
+        retired: Accumulated metrics of finished sessions, so counters never go backwards
+
+    Returns:
+        str: Exposition text suitable for a ``/metrics`` endpoint
+    """
+    active = list(active)
+    totals = ProctorMetrics()
+    if retired is not None:
+        totals.merge(retired)
+    for metrics in active:
+        totals.merge(metrics)
+
+    lines: List[str] = [
+        '# HELP proctor_stage_seconds Time spent in each ProctorAI analysis stage',
+        '# TYPE proctor_stage_seconds histogram'
+    ]
+    for stage, histogram in totals.histograms.items():
+        cumulative = 0
+        for bound, bucket_count in zip(LatencyHistogram.BUCKET_BOUNDS, histogram.counts):
+            cumulative += bucket_count
+            lines.append(f'proctor_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'proctor_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+        lines.append(f'proctor_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+        lines.append(f'proctor_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+    staleness = [s for s in (m.seconds_since_last_frame() for m in active) if s is not None]
+    series = (
+        ('proctor_frames_analyzed_total', 'counter', 'Frames run through ProctorAI.analyze_frame',
+         totals.frames_analyzed),
+        ('proctor_frames_dropped_total', 'counter', 'Frames skipped because analysis was still busy',
+         totals.frames_dropped),
+        ('proctor_active_sessions', 'gauge', 'Sessions currently being proctored', len(active)),
+        ('proctor_max_seconds_since_last_frame', 'gauge',
+         'Longest time any active session has gone without an analyzed frame',
+         max(staleness) if staleness else None)
+    )
+    for name, metric_type, help_text, value in series:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if value is not None:
+            lines.append(f'{name} {value}')
+
+    return '\n'.join(lines) + '\n'
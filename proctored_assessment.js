@@ -1,3 +1,13 @@
+const PREFETCH_WINDOW = 5; // Questions fetched per bulk request
+
+// Adaptive frame upload: check for motion often, upload only when needed
+const MOTION_CHECK_INTERVAL_MS = 1000;
+const MIN_FRAME_INTERVAL_MS = 1000;
+const MAX_FRAME_INTERVAL_MS = 5000;
+const MOTION_THRESHOLD = 12; // Mean gray-level change (0-255) on the thumbnail
+const MOTION_WIDTH = 32;
+const MOTION_HEIGHT = 24;
+
 class ProctoredAssessment {
     constructor() {
         this.sessionId = null;
@@ -6,6 +16,13 @@ class ProctoredAssessment {
         this.userAnswers = [];
         this.webcamStream = null;
         this.violationCount = 0;
+        this.questionCache = new Map();
+        this.pendingFetches = new Map();
+        this.motionCanvas = null;
+        this.lastSentThumbnail = null;
+        this.lastFrameSentAt = 0;
+        this.frameInFlight = false;
+        this.avgAnalysisMs = 0;
         
         this.init();
     }
@@ -35,9 +52,54 @@ class ProctoredAssessment {
     }
     
     startFrameMonitoring() {
+        this.motionCanvas = document.createElement('canvas');
+        this.motionCanvas.width = MOTION_WIDTH;
+        this.motionCanvas.height = MOTION_HEIGHT;
+        
         setInterval(() => {
+            this.checkForMotion();
+        }, MOTION_CHECK_INTERVAL_MS);
+    }
+    
+    getThumbnail() {
+        const video = document.getElementById('webcamFeed');
+        const ctx = this.motionCanvas.getContext('2d');
+        ctx.drawImage(video, 0, 0, MOTION_WIDTH, MOTION_HEIGHT);
+        
+        const pixels = ctx.getImageData(0, 0, MOTION_WIDTH, MOTION_HEIGHT).data;
+        const gray = new Uint8Array(MOTION_WIDTH * MOTION_HEIGHT);
+        for (let i = 0; i < gray.length; i++) {
+            gray[i] = (pixels[i * 4] * 77 + pixels[i * 4 + 1] * 150 + pixels[i * 4 + 2] * 29) >> 8;
+        }
+        return gray;
+    }
+    
+    checkForMotion() {
+        if (!this.sessionId || this.frameInFlight) return;
+        
+        const elapsed = Date.now() - this.lastFrameSentAt;
+        // Back off when the server is slow to analyze frames
+        const minInterval = Math.min(
+            Math.max(MIN_FRAME_INTERVAL_MS, this.avgAnalysisMs * 2),
+            MAX_FRAME_INTERVAL_MS
+        );
+        if (elapsed < minInterval) return;
+        
+        const thumbnail = this.getThumbnail();
+        let send = elapsed >= MAX_FRAME_INTERVAL_MS || this.lastSentThumbnail === null;
+        
+        if (!send) {
+            let diff = 0;
+            for (let i = 0; i < thumbnail.length; i++) {
+                diff += Math.abs(thumbnail[i] - this.lastSentThumbnail[i]);
+            }
+            send = diff / thumbnail.length >= MOTION_THRESHOLD;
+        }
+        
+        if (send) {
+            this.lastSentThumbnail = thumbnail;
             this.captureAndAnalyzeFrame();
-        }, 5000); // Analyze every 5 seconds
+        }
     }
     
     captureAndAnalyzeFrame() {
@@ -60,6 +122,10 @@ class ProctoredAssessment {
     }
     
     async sendFrameForAnalysis(frameData) {
+        const startedAt = Date.now();
+        this.lastFrameSentAt = startedAt;
+        this.frameInFlight = true;
+        
         try {
             const response = await fetch('/api/submit-answer', {
                 method: 'POST',
@@ -81,6 +147,10 @@ class ProctoredAssessment {
             
         } catch (error) {
             console.error('Error analyzing frame:', error);
+        } finally {
+            const analysisMs = Date.now() - startedAt;
+            this.avgAnalysisMs = this.avgAnalysisMs ? this.avgAnalysisMs * 0.8 + analysisMs * 0.2 : analysisMs;
+            this.frameInFlight = false;
         }
     }
     
@@ -136,6 +206,12 @@ class ProctoredAssessment {
                 method: 'POST'
             });
             const sessionData = await sessionResponse.json();
+            
+            if (!sessionResponse.ok) {
+                // 503 when the server is at its session limit
+                alert(sessionData.error || 'Failed to start proctored session');
+                return;
+            }
             this.sessionId = sessionData.session_id;
             
             // Upload PDF
@@ -152,10 +228,21 @@ class ProctoredAssessment {
             
             const uploadResult = await uploadResponse.json();
             
-            if (uploadResult.success) {
-                this.totalQuestions = uploadResult.num_questions;
+            if (!uploadResult.success) {
+                alert(uploadResult.error || 'Failed to upload PDF');
+                return;
+            }
+            
+            // Quiz generation runs in the background; poll until it finishes
+            const jobResult = await this.waitForJob(uploadResult.status_url);
+            
+            if (jobResult.status === 'completed') {
+                this.totalQuestions = jobResult.num_questions;
+                this.questionCache.clear();
                 document.getElementById('uploadSection').style.display = 'none';
                 this.loadQuestion(0);
+            } else {
+                alert(jobResult.error || 'Failed to generate quiz');
             }
             
         } catch (error) {
@@ -164,18 +251,71 @@ class ProctoredAssessment {
         }
     }
     
+    async waitForJob(statusUrl) {
+        const startButton = document.getElementById('startAssessment');
+        const buttonLabel = startButton.textContent;
+        
+        while (true) {
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+            
+            if (job.status === 'completed' || job.status === 'failed' || !response.ok) {
+                startButton.textContent = buttonLabel;
+                return job;
+            }
+            
+            startButton.textContent = `${job.message || 'Preparing quiz'}... ${Math.round(job.progress * 100)}%`;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+    
     async loadQuestion(questionNum) {
         try {
-            const response = await fetch(`/api/get-question/${this.sessionId}/${questionNum}`);
-            const questionData = await response.json();
+            if (!this.questionCache.has(questionNum)) {
+                await this.fetchQuestionWindow(questionNum);
+            }
             
-            this.displayQuestion(questionData);
+            this.displayQuestion(this.questionCache.get(questionNum));
+            
+            // Prefetch the next window while this question is being answered
+            const nextUncached = questionNum + PREFETCH_WINDOW;
+            if (nextUncached < this.totalQuestions && !this.questionCache.has(nextUncached)) {
+                this.fetchQuestionWindow(nextUncached).catch(error => {
+                    console.error('Error prefetching questions:', error);
+                });
+            }
             
         } catch (error) {
             console.error('Error loading question:', error);
         }
     }
     
+    fetchQuestionWindow(start) {
+        // Share in-flight requests so a prefetch and a load never duplicate work
+        if (this.pendingFetches.has(start)) {
+            return this.pendingFetches.get(start);
+        }
+        
+        const request = fetch(`/api/get-questions/${this.sessionId}?start=${start}&count=${PREFETCH_WINDOW}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to fetch questions (${response.status})`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                data.questions.forEach((question, offset) => {
+                    this.questionCache.set(data.start + offset, question);
+                });
+            })
+            .finally(() => {
+                this.pendingFetches.delete(start);
+            });
+        
+        this.pendingFetches.set(start, request);
+        return request;
+    }
+    
     displayQuestion(questionData) {
         const questionSection = document.getElementById('questionSection');
         questionSection.style.display = 'block';
@@ -233,6 +373,7 @@ class ProctoredAssessment {
                 },
                 body: JSON.stringify({
                     session_id: this.sessionId,
+                    question_num: this.currentQuestion,
                     answer: this.selectedAnswer,
                     webcam_frame: null
                 })
@@ -8,15 +8,21 @@ import json
 from datetime import datetime
 import threading
 import queue
+from proctor_metrics import ProctorMetrics
+from evidence_recorder import EvidenceRecorder
 
-class ProctorAI:
-    """AI-powered proctoring system using computer vision"""
+class ProctorSessionLog:
+    """Violation counters, timeline and report for one proctoring session"""
     
-    def __init__(self):
-        # Initialize face detection and recognition
-        self.face_detector = dlib.get_frontal_face_detector()
-        self.shape_predictor = dlib.shape_predictor("shape_predictor_68_face_landmarks.dat")
-        
+    # Violation names reported by analyze_frame -> counter they increment
+    VIOLATION_COUNTERS = {
+        'no_face_detected': 'no_face',
+        'multiple_faces_detected': 'multiple_faces',
+        'looking_away': 'looking_away',
+        'phone_detected': 'phone_detected'
+    }
+    
+    def __init__(self, enable_metrics: bool = True, evidence_recorder: Optional[EvidenceRecorder] = None):
         # Proctoring flags and counters
         self.violations = {
             'multiple_faces': 0,
@@ -27,14 +33,89 @@ class ProctorAI:
         }
         
         self.session_start_time = None
-        self.last_face_encoding = None
         self.violation_timestamps = []
         
-    def start_session(self, reference_image_path: Optional[str] = None):
-        """Start proctoring session"""
+        # Per-stage latency instrumentation; None disables it entirely
+        self.metrics = ProctorMetrics() if enable_metrics else None
+        
+        # Optional clip recorder; frames are fed to it by the capture side (e.g. WebcamHandler)
+        self.evidence_recorder = evidence_recorder
+    
+    def start_session(self):
+        """Reset counters and timeline for a new session"""
         self.session_start_time = datetime.now()
         self.violations = {k: 0 for k in self.violations.keys()}
         self.violation_timestamps = []
+        if self.metrics:
+            self.metrics = ProctorMetrics()
+    
+    def record_violations(self, violations_detected: List[str]):
+        """Count a frame's violations and log them with a timestamp"""
+        if not violations_detected:
+            return
+        
+        for violation in violations_detected:
+            counter = self.VIOLATION_COUNTERS.get(violation)
+            if counter:
+                self.violations[counter] += 1
+        
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'violations': violations_detected
+        }
+        if self.evidence_recorder:
+            clip_id = self.evidence_recorder.trigger(violations_detected)
+            if clip_id:
+                entry['evidence_clip'] = clip_id
+        self.violation_timestamps.append(entry)
+    
+    def get_session_report(self) -> Dict:
+        """Generate final proctoring report"""
+        session_duration = (datetime.now() - self.session_start_time).total_seconds() if self.session_start_time else 0
+        
+        report = {
+            'session_duration': session_duration,
+            'total_violations': sum(self.violations.values()),
+            'violation_breakdown': self.violations,
+            'violation_timeline': self.violation_timestamps,
+            'integrity_score': max(0, 100 - sum(self.violations.values()) * 5),
+            'session_start': self.session_start_time.isoformat() if self.session_start_time else None
+        }
+        
+        if self.metrics:
+            report['performance'] = self.metrics.snapshot()
+        
+        return report
+
+class ProctorAI(ProctorSessionLog):
+    """AI-powered proctoring system using computer vision"""
+    
+    SHAPE_PREDICTOR_PATH = "shape_predictor_68_face_landmarks.dat"
+    
+    # The landmark model is ~100 MB and safe to use from several threads, so it
+    # is loaded once per process and shared by every ProctorAI instance
+    _shared_shape_predictor = None
+    _model_lock = threading.Lock()
+    
+    @classmethod
+    def get_shape_predictor(cls):
+        """Load the landmark model on first use and return the shared instance"""
+        with cls._model_lock:
+            if cls._shared_shape_predictor is None:
+                cls._shared_shape_predictor = dlib.shape_predictor(cls.SHAPE_PREDICTOR_PATH)
+            return cls._shared_shape_predictor
+    
+    def __init__(self, enable_metrics: bool = True, evidence_recorder: Optional[EvidenceRecorder] = None):
+        super().__init__(enable_metrics, evidence_recorder)
+        
+        # Initialize face detection and recognition
+        self.face_detector = dlib.get_frontal_face_detector()
+        self.shape_predictor = self.get_shape_predictor()
+        self.last_face_encoding = None
+        
+    def start_session(self, reference_image_path: Optional[str] = None):
+        """Start proctoring session"""
+        super().start_session()
         
         if reference_image_path:
             self.load_reference_face(reference_image_path)
@@ -50,18 +131,21 @@ class ProctorAI:
     def analyze_frame(self, frame: np.ndarray) -> Dict:
         """Analyze a single frame for violations"""
         violations_detected = []
+        metrics = self.metrics
+        if metrics:
+            frame_start = stage_start = time.perf_counter()
         
         # Convert to RGB for face_recognition library
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
         # Detect faces
         faces = face_recognition.face_locations(rgb_frame)
+        if metrics:
+            stage_start = metrics.record('face_locations', stage_start)
         
         if len(faces) == 0:
-            self.violations['no_face'] += 1
             violations_detected.append('no_face_detected')
         elif len(faces) > 1:
-            self.violations['multiple_faces'] += 1
             violations_detected.append('multiple_faces_detected')
         else:
             # Single face detected - check for other violations
@@ -71,23 +155,25 @@ class ProctorAI:
                 matches = face_recognition.compare_faces([self.last_face_encoding], face_encodings[0])
                 if not matches[0]:
                     violations_detected.append('identity_mismatch')
+            if metrics:
+                stage_start = metrics.record('face_encodings', stage_start)
             
             # Check gaze direction and head pose
             if self.check_looking_away(frame, faces[0]):
-                self.violations['looking_away'] += 1
                 violations_detected.append('looking_away')
+            if metrics:
+                stage_start = metrics.record('looking_away', stage_start)
         
         # Check for phone/electronic devices
         if self.detect_phone(frame):
-            self.violations['phone_detected'] += 1
             violations_detected.append('phone_detected')
+        if metrics:
+            metrics.record('phone_detection', stage_start)
+            metrics.record('total', frame_start)
+            metrics.frame_analyzed()
         
-        # Log violations with timestamp
-        if violations_detected:
-            self.violation_timestamps.append({
-                'timestamp': datetime.now().isoformat(),
-                'violations': violations_detected
-            })
+        # Count and log violations with timestamp
+        self.record_violations(violations_detected)
         
         return {
             'violations': violations_detected,
@@ -144,16 +230,3 @@ class ProctorAI:
                 if 0.4 < aspect_ratio < 0.8:  # Phone-like aspect ratio
                     return True
         return False
-    
-    def get_session_report(self) -> Dict:
-        """Generate final proctoring report"""
-        session_duration = (datetime.now() - self.session_start_time).total_seconds() if self.session_start_time else 0
-        
-        return {
-            'session_duration': session_duration,
-            'total_violations': sum(self.violations.values()),
-            'violation_breakdown': self.violations,
-            'violation_timeline': self.violation_timestamps,
-            'integrity_score': max(0, 100 - sum(self.violations.values()) * 5),
-            'session_start': self.session_start_time.isoformat() if self.session_start_time else None
-        }
\ No newline at end of file
@@ -1,9 +1,10 @@
 import nltk
 import random
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass
 from collections import Counter
+from corpus_index import CorpusIndex
 
 # Download required NLTK data (run once)
 try:
@@ -32,11 +33,21 @@ class QuizQuestion:
 class FreeQuizGenerator:
     """Generate quizzes without requiring external APIs."""
     
-    def __init__(self):
+    def __init__(self, corpus_index: Optional[CorpusIndex] = None):
         self.stop_words = set(stopwords.words('english'))
+        self.corpus_index = corpus_index
     
-    def generate_quiz_from_text(self, text: str, num_questions: int = 10) -> List[QuizQuestion]:
-        """Generate quiz questions using NLP techniques."""
+    def generate_quiz_from_text(self, text: str, num_questions: int = 10,
+                                term_counts: Optional[Counter] = None) -> List[QuizQuestion]:
+        """
+        Generate quiz questions using NLP techniques.
+        
+        Args:
+            text (str): Document text
+            num_questions (int): Number of questions to generate
+            term_counts (Optional[Counter]): Result of ``count_candidate_terms`` for this
+                text, if already computed, so the text is not tagged twice
+        """
         
         # Clean and prepare text
         sentences = sent_tokenize(text)
@@ -49,7 +60,7 @@ class FreeQuizGenerator:
         used_sentences = set()
         
         # Extract key information
-        key_terms = self._extract_key_terms(text)
+        key_terms = self._extract_key_terms(text, term_counts)
         
         for i in range(num_questions):
             # Select a sentence that hasn't been used
@@ -78,8 +89,22 @@ class FreeQuizGenerator:
         
         return questions
     
-    def _extract_key_terms(self, text: str) -> List[str]:
-        """Extract important terms from the text."""
+    def index_document(self, doc_id: str, text: str, term_counts: Optional[Counter] = None) -> Counter:
+        """
+        Add a document's candidate terms to the corpus index.
+        
+        Returns:
+            Counter: The document's term counts, to pass on to ``generate_quiz_from_text``
+        """
+        if self.corpus_index is None:
+            raise ValueError("Corpus mode requires a CorpusIndex")
+        if term_counts is None:
+            term_counts = self.count_candidate_terms(text)
+        self.corpus_index.add_document(doc_id, term_counts.keys())
+        return term_counts
+    
+    def count_candidate_terms(self, text: str) -> Counter:
+        """Count candidate key terms (nouns and adjectives) in the text."""
         words = word_tokenize(text.lower())
         
         # Remove stopwords and punctuation
@@ -91,8 +116,18 @@ class FreeQuizGenerator:
         # Extract nouns and proper nouns
         key_terms = [word for word, tag in pos_tags if tag.startswith('NN') or tag.startswith('JJ')]
         
+        return Counter(key_terms)
+    
+    def _extract_key_terms(self, text: str, term_counts: Optional[Counter] = None) -> List[str]:
+        """Extract important terms from the text."""
+        term_freq = term_counts if term_counts is not None else self.count_candidate_terms(text)
+        
+        # In corpus mode, down-weight terms that appear throughout the course
+        if self.corpus_index is not None and self.corpus_index.num_documents:
+            long_terms = {term: freq for term, freq in term_freq.items() if len(term) > 3}
+            return self.corpus_index.rank_terms(long_terms, 50)
+        
         # Get most common terms
-        term_freq = Counter(key_terms)
         return [term for term, freq in term_freq.most_common(50) if len(term) > 3]
     
     def _create_fill_blank_question(self, sentence: str, key_terms: List[str]) -> QuizQuestion:
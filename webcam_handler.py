@@ -1,18 +1,92 @@
 import cv2
 import numpy as np
 import base64
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, Tuple
+from dataclasses import dataclass
 import threading
 import time
+from evidence_recorder import EvidenceRecorder
+
+@dataclass
+class AnalysisRateConfig:
+    """Bounds and thresholds for the adaptive analysis scheduler"""
+    min_rate: float = 0.5            # Analyses per second even if nothing moves
+    max_rate: float = 10.0           # Never analyze faster than this
+    capture_rate: float = 15.0       # Frames read per second for motion checks
+    motion_threshold: float = 6.0    # Mean absolute gray-level change that counts as motion
+    cpu_budget: float = 0.5          # Fraction of one core the analysis callback may use
+    motion_size: Tuple[int, int] = (32, 24)
+
+class AdaptiveAnalysisScheduler:
+    """Decide which captured frames get the full (expensive) analysis.
+    
+    A frame is analyzed when a cheap motion score, the mean absolute
+    difference of a tiny grayscale thumbnail against the last analyzed frame,
+    crosses the threshold, or when ``1 / min_rate`` seconds pass without an
+    analysis. Analyses are spaced out so the callback's measured CPU time
+    stays within ``cpu_budget`` and never overlap its measured latency, but
+    never below ``min_rate``.
+    """
+    
+    SMOOTHING = 0.2
+    
+    def __init__(self, config: Optional[AnalysisRateConfig] = None):
+        self.config = config or AnalysisRateConfig()
+        self.motion_score = 0.0
+        self.avg_latency = 0.0
+        self.avg_cpu_time = 0.0
+        self._reference = None
+        self._candidate = None
+        self._last_analysis_at = None
+    
+    def min_interval(self) -> float:
+        """Current minimum spacing between analyses, in seconds"""
+        budget_interval = self.avg_cpu_time / self.config.cpu_budget
+        # Wall-clock latency matters too: a callback can be cheap in CPU but slow,
+        # e.g. handing frames to worker processes or native code releasing the GIL
+        interval = max(1.0 / self.config.max_rate, budget_interval, self.avg_latency)
+        return min(interval, 1.0 / self.config.min_rate)
+    
+    def should_analyze(self, frame: np.ndarray, now: float) -> bool:
+        """Check whether this frame should be passed to the full analysis"""
+        small = cv2.resize(frame, self.config.motion_size, interpolation=cv2.INTER_AREA)
+        self._candidate = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        
+        if self._reference is None or self._last_analysis_at is None:
+            return True
+        
+        elapsed = now - self._last_analysis_at
+        if elapsed < self.min_interval():
+            return False
+        if elapsed >= 1.0 / self.config.min_rate:
+            return True
+        
+        self.motion_score = float(cv2.absdiff(self._candidate, self._reference).mean())
+        return self.motion_score >= self.config.motion_threshold
+    
+    def record_analysis(self, now: float, latency: float, cpu_time: float):
+        """Update the reference frame and cost estimates after an analysis"""
+        self._reference = self._candidate
+        self._last_analysis_at = now
+        if self.avg_latency == 0.0:
+            self.avg_latency, self.avg_cpu_time = latency, cpu_time
+        else:
+            self.avg_latency += self.SMOOTHING * (latency - self.avg_latency)
+            self.avg_cpu_time += self.SMOOTHING * (cpu_time - self.avg_cpu_time)
 
 class WebcamHandler:
     """Handle webcam operations for proctoring"""
     
-    def __init__(self):
+    def __init__(self, rate_config: Optional[AnalysisRateConfig] = None,
+                 evidence_recorder: Optional[EvidenceRecorder] = None):
         self.cap = None
         self.is_recording = False
         self.frame_callback: Optional[Callable] = None
         self.current_frame = None
+        self.scheduler = AdaptiveAnalysisScheduler(rate_config)
+        self.frames_captured = 0
+        self.frames_analyzed = 0
+        self.evidence_recorder = evidence_recorder
         
     def initialize_camera(self, camera_index: int = 0) -> bool:
         """Initialize camera connection"""
@@ -32,16 +106,40 @@ class WebcamHandler:
         self.is_recording = True
         
         def monitor_loop():
+            capture_interval = 1.0 / self.scheduler.config.capture_rate
             while self.is_recording and self.cap:
+                loop_start = time.perf_counter()
                 ret, frame = self.cap.read()
                 if ret:
                     self.current_frame = frame
-                    if self.frame_callback:
+                    self.frames_captured += 1
+                    if self.evidence_recorder:
+                        self.evidence_recorder.add_frame(frame)
+                    # Only run the full analysis on frames the scheduler selects
+                    if self.frame_callback and self.scheduler.should_analyze(frame, loop_start):
+                        analysis_start = time.perf_counter()
+                        cpu_start = time.thread_time()
                         self.frame_callback(frame)
-                time.sleep(0.1)  # 10 FPS for analysis
+                        self.frames_analyzed += 1
+                        self.scheduler.record_analysis(
+                            analysis_start,
+                            time.perf_counter() - analysis_start,
+                            time.thread_time() - cpu_start
+                        )
+                time.sleep(max(0.0, capture_interval - (time.perf_counter() - loop_start)))
         
         threading.Thread(target=monitor_loop, daemon=True).start()
     
+    def get_analysis_stats(self) -> Dict:
+        """Get capture/analysis counts and the scheduler's current state"""
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_analyzed': self.frames_analyzed,
+            'motion_score': self.scheduler.motion_score,
+            'avg_analysis_latency': self.scheduler.avg_latency,
+            'analysis_interval': self.scheduler.min_interval()
+        }
+    
     def get_current_frame_b64(self) -> Optional[str]:
         """Get current frame as base64 string"""
         if self.current_frame is not None:
@@ -53,6 +151,8 @@ class WebcamHandler:
     def stop_monitoring(self):
         """Stop camera monitoring"""
         self.is_recording = False
+        if self.evidence_recorder:
+            self.evidence_recorder.flush()
         if self.cap:
             self.cap.release()
             cv2.destroyAllWindows()